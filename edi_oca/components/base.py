@@ -18,6 +18,15 @@ class EDIBackendComponentMixin(AbstractComponent):
         super().__init__(work_context)
         self.backend = work_context.backend
 
+    @classmethod
+    def _complete_component_build(cls):
+        super()._complete_component_build()
+        # Priority used by `edi.backend` to pick a component among matching ones
+        cls._edi_sort_key = (
+            1 if cls._backend_type else 0,
+            1 if cls._exchange_type else 0,
+        )
+
     @staticmethod
     def _match_attrs():
         """Attributes to be used for matching this component.
@@ -34,6 +43,10 @@ class EDIBackendComponentMixin(AbstractComponent):
 
         Registry lookup filtered by usage and model_name when landing here.
         Now, narrow match to `_match_attrs` attributes.
+
+        NOTE: the result must depend only on the lookup args (usage, model_name, kw)
+        and not on `work`: `edi.backend` caches matching components
+        by components registry and lookup args.
         """
         match_attrs = cls._match_attrs()
         if not any([kw.get(k) for k in match_attrs]):
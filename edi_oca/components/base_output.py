@@ -13,6 +13,11 @@ class EDIBackendOutputComponentMixin(AbstractComponent):
     _usage = "edi.output.generate.*"
 
     def generate(self):
+        """Return the output content.
+
+        Return `bytes` when possible: text output is encoded by the backend
+        w/ the encoding of the exchange type, which requires an extra copy.
+        """
         raise NotImplementedError()
 
 
@@ -8,24 +8,35 @@
 import base64
 import logging
 import traceback
-from io import StringIO
+import weakref
+from collections import defaultdict
 
 from odoo import _, exceptions, fields, models
+from odoo.tools import groupby
 
 from odoo.addons.component.exception import NoComponentError
 from odoo.addons.queue_job.exception import RetryableJobError
+from odoo.addons.queue_job.job import (
+    ENQUEUED,
+    PENDING,
+    STARTED,
+    WAIT_DEPENDENCIES,
+    identity_exact,
+)
 
 from ..exceptions import EDIValidationError
+from ..utils import exchange_record_job_identity
 
 _logger = logging.getLogger(__name__)
 
+_VALID_EDI_ACTIONS = frozenset(("generate", "send", "process", "receive", "check"))
+
+# Matching component classes by components registry
+_matching_components_cache = weakref.WeakKeyDictionary()
+
 
 def _get_exception_msg():
-    buff = StringIO()
-    traceback.print_exc(file=buff)
-    traceback_txt = buff.getvalue()
-    buff.close()
-    return traceback_txt
+    return traceback.format_exc()
 
 
 class EDIBackend(models.Model):
@@ -42,6 +53,8 @@ class EDIBackend(models.Model):
     _name = "edi.backend"
     _description = "EDI Backend"
     _inherit = ["collection.base"]
+    # Size of the id ranges of output records generated in the same job
+    _output_generate_batch_size = 100
 
     name = fields.Char(required=True)
     backend_type_id = fields.Many2one(
@@ -73,7 +86,9 @@ class EDIBackend(models.Model):
         work_ctx.update(record_conf.get("work_ctx", {}))
         # Model is not granted to be there
         model = exchange_record.model or self._name
-        candidates = self._get_component_usage_candidates(exchange_record, key)
+        candidates = self._get_component_usage_candidates(
+            exchange_record, key, record_conf=record_conf
+        )
         match_attrs = self._component_match_attrs(exchange_record, key)
         return collection._find_component(
             model,
@@ -83,7 +98,7 @@ class EDIBackend(models.Model):
         )
 
     def _get_component_env_ctx(self, record_conf, key):
-        env_ctx = record_conf.get("env_ctx", {})
+        env_ctx = dict(record_conf.get("env_ctx", {}))
         # You can use `edi_session` down in the stack to control logics.
         env_ctx.update(dict(edi_framework_action=key))
         return env_ctx
@@ -104,10 +119,8 @@ class EDIBackend(models.Model):
         The order can be very important if your implementation
         allow generic / default components to be registered.
         """
-        return (
-            1 if component_class._backend_type else 0,
-            1 if component_class._exchange_type else 0,
-        )
+        # Precomputed when EDI components get built
+        return component_class._edi_sort_key
 
     def _find_component(self, model, usage_candidates, safe=True, work_ctx=None, **kw):
         """Retrieve component for current backend.
@@ -124,16 +137,14 @@ class EDIBackend(models.Model):
             work_ctx["backend"] = self
         with self.work_on(model, **work_ctx) as work:
             for usage in usage_candidates:
-                components, c_work_ctx = work._matching_components(usage=usage, **kw)
+                components = self._matching_component_classes(work, usage, **kw)
                 if not components:
                     continue
-                # Sort components and pick the 1st one matching.
+                # Pick the component w/ the highest priority (1st one on ties).
                 # In this way we support generic components registration
                 # and specific components registrations
-                components = sorted(
-                    components, key=lambda x: self._component_sort_key(x), reverse=True
-                )
-                component = components[0](c_work_ctx)
+                component_cls = max(components, key=self._component_sort_key)
+                component = component_cls(self._matching_work_context(work, **kw))
                 _logger.debug("using component %s", component._name)
                 break
         if not component and not safe:
@@ -142,24 +153,52 @@ class EDIBackend(models.Model):
             )
         return component or None
 
-    def _get_component_usage_candidates(self, exchange_record, key):
-        """Retrieve usage candidates for components."""
+    def _matching_component_classes(self, work, usage, **kw):
+        """Retrieve component classes matching given usage and lookup args.
+
+        Matching depends only on the components registry and on lookup args,
+        hence the result is cached per registry.
+        Only classes are cached: the work context is not part of the key.
+        Lookup args that cannot be hashed bypass the cache.
+        """
+        cache = _matching_components_cache.setdefault(work.components_registry, {})
+        key = (work.collection._name, work.model_name, usage, tuple(sorted(kw.items())))
+        try:
+            return cache[key]
+        except TypeError:
+            # Unhashable lookup args
+            return work._matching_components(usage=usage, **kw)[0]
+        except KeyError:
+            pass
+        cache[key] = work._matching_components(usage=usage, **kw)[0]
+        return cache[key]
+
+    def _matching_work_context(self, work, model_name=None, **kw):
+        """Work context for matched components, as `work._matching_components`."""
+        if model_name == work.model_name:
+            return work
+        return work.work_on(model_name)
+
+    def _get_component_usage_candidates(self, exchange_record, key, record_conf=None):
+        """Retrieve usage candidates for components.
+
+        :param record_conf: components' conf for the record, if already computed
+        :return: tuple of usages by priority
+        """
         # fmt:off
         base_usage = ".".join([
             exchange_record.direction,
             key,
         ])
         # fmt:on
-        record_conf = self._get_component_conf_for_record(exchange_record, key)
-        candidates = [record_conf["usage"]] if record_conf else []
-        candidates += [
-            base_usage,
-        ]
-        return candidates
+        if record_conf is None:
+            record_conf = self._get_component_conf_for_record(exchange_record, key)
+        if record_conf:
+            return (record_conf["usage"], base_usage)
+        return (base_usage,)
 
     def _get_component_conf_for_record(self, exchange_record, key):
-        settings = exchange_record.type_id.get_settings()
-        return settings.get("components", {}).get(key, {})
+        return exchange_record.type_id._get_component_conf(key)
 
     @property
     def exchange_record_model(self):
@@ -205,19 +244,15 @@ class EDIBackend(models.Model):
         :param kw: keyword args to be propagated to output generate handler
         """
         self.ensure_one()
-        if force and exchange_record.exchange_file:
+        if force and exchange_record._has_file_content():
             # Remove file to regenerate
             exchange_record.exchange_file = False
         self._check_exchange_generate(exchange_record, force=force)
         output = self._exchange_generate(exchange_record, **kw)
         message = None
-        encoding = exchange_record.type_id.encoding or "UTF-8"
-        encoding_error_handler = (
-            exchange_record.type_id.encoding_out_error_handler or "strict"
-        )
         if output and store:
             if not isinstance(output, bytes):
-                output = output.encode(encoding, errors=encoding_error_handler)
+                output = self._exchange_generate_encode(exchange_record, output)
             exchange_record.update(
                 {
                     "exchange_file": base64.b64encode(output),
@@ -238,12 +273,20 @@ class EDIBackend(models.Model):
         exchange_record.notify_action_complete("generate", message=message)
         return message
 
+    def _exchange_generate_encode(self, exchange_record, output):
+        """Encode generated text w/ the encoding of the exchange type."""
+        exchange_type = exchange_record.type_id
+        return output.encode(
+            exchange_type.encoding or "UTF-8",
+            errors=exchange_type.encoding_out_error_handler or "strict",
+        )
+
     # TODO: unify to all other checkes that return something
     def _check_exchange_generate(self, exchange_record, force=False):
         exchange_record.ensure_one()
         if (
             exchange_record.edi_exchange_state != "new"
-            and exchange_record.exchange_file
+            and exchange_record._has_file_content()
             and not force
         ):
             raise exceptions.UserError(
@@ -261,7 +304,7 @@ class EDIBackend(models.Model):
                 )
                 % exchange_record.id
             )
-        if exchange_record.exchange_file:
+        if exchange_record._has_file_content():
             raise exceptions.UserError(
                 _("Exchange record ID=%d already has a file to process!")
                 % exchange_record.id
@@ -275,7 +318,10 @@ class EDIBackend(models.Model):
 
     # TODO: add tests
     def _validate_data(self, exchange_record, value=None, **kw):
-        if exchange_record.direction == "input" and not exchange_record.exchange_file:
+        if (
+            exchange_record.direction == "input"
+            and not exchange_record._has_file_content()
+        ):
             if not exchange_record.type_id.allow_empty_files_on_receive:
                 raise ValueError(
                     _("Empty files are not allowed for this exchange type")
@@ -359,7 +405,7 @@ class EDIBackend(models.Model):
             raise exceptions.UserError(
                 _("Record ID=%d is not meant to be sent!") % exchange_record.id
             )
-        if not exchange_record.exchange_file:
+        if not exchange_record._has_file_content():
             raise exceptions.UserError(
                 _("Record ID=%d has no file to send!") % exchange_record.id
             )
@@ -375,8 +421,37 @@ class EDIBackend(models.Model):
         raise NotImplementedError("No handler for `_exchange_send`")
 
     def _cron_check_output_exchange_sync(self, **kw):
+        # Run each backend in its own job: a slow backend won't hold the others
         for backend in self:
-            backend._check_output_exchange_sync(**kw)
+            backend.with_delay(
+                identity_key=identity_exact
+            )._job_check_output_exchange_sync(**kw)
+
+    def _lock_exchange_sync(self, direction):
+        """Prevent sync jobs of the same backend and direction to overlap.
+
+        Queue jobs are not deduplicated anymore once started:
+        a slow sync job could run together w/ the one of the next cron run
+        and both would enqueue the same exchange jobs.
+        The lock is released at the end of the transaction.
+
+        :raise RetryableJobError: if another sync job holds the lock
+        """
+        self.ensure_one()
+        self.env.cr.execute(
+            "SELECT pg_try_advisory_xact_lock(hashtext(%s), %s)",
+            ("edi_backend_{}_sync".format(direction), self.id),
+        )
+        if not self.env.cr.fetchone()[0]:
+            raise RetryableJobError(
+                "{} sync already running for backend {}".format(direction, self.id),
+                ignore_retry=True,
+            )
+
+    def _job_check_output_exchange_sync(self, **kw):
+        """Run `_check_output_exchange_sync` in a job, one at a time per backend."""
+        self._lock_exchange_sync("output")
+        return self._check_output_exchange_sync(**kw)
 
     def _check_output_exchange_sync(
         self, skip_send=False, skip_sent=True, record_ids=None
@@ -397,38 +472,130 @@ class EDIBackend(models.Model):
             "EDI Exchange output sync: found %d new records to process.",
             len(new_records),
         )
-        for rec in new_records:
-            job1 = rec.delayable().action_exchange_generate()
-            if not skip_send:
-                # Chain send job.
-                # Raise prio to max to send the record out as fast as possible.
-                job1.on_done(rec.delayable(priority=0).action_exchange_send())
-            job1.delay()
+        if new_records:
+            self._delay_exchange_generate_batches(new_records, skip_send=skip_send)
 
         if skip_send:
             return
-        pending_records = self.exchange_record_model.search(
+        pending_ids_by_state = self._exchange_record_ids_by_state(
             self._output_pending_records_domain(
                 skip_sent=skip_sent, record_ids=record_ids
             )
         )
         _logger.info(
             "EDI Exchange output sync: found %d pending records to process.",
-            len(pending_records),
+            sum(len(ids) for ids in pending_ids_by_state.values()),
         )
-        for rec in pending_records:
-            if rec.edi_exchange_state == "output_pending":
-                rec.with_delay().action_exchange_send()
+        for state, ids in pending_ids_by_state.items():
+            records = self.exchange_record_model.browse(ids)
+            if state == "output_pending":
+                records._job_delay_params_prefetch()
+                for rec in records:
+                    rec.with_delay().action_exchange_send()
             else:
-                # TODO: run in job as well?
-                self._exchange_output_check_state(rec)
+                for rec in records:
+                    # TODO: run in job as well?
+                    self._exchange_output_check_state(rec)
+
+    def _delay_exchange_generate(self, exchange_record, skip_send=False):
+        """Enqueue output generation of given record, followed by sending."""
+        job1 = exchange_record.delayable().action_exchange_generate()
+        if not skip_send:
+            # Chain send job.
+            # Raise prio to max to send the record out as fast as possible.
+            job1.on_done(exchange_record.delayable(priority=0).action_exchange_send())
+        job1.delay()
+
+    def _delay_exchange_generate_batches(self, exchange_records, skip_send=False):
+        """Enqueue output generation of given records, by type and id range.
+
+        Jobs look up the records to generate when they run,
+        hence their identity does not depend on the records found here
+        and a waiting job takes care of records created in the meantime.
+        """
+        exchange_records -= self._exchange_records_in_generate_jobs(exchange_records)
+        exchange_records._job_delay_params_prefetch()
+        size = self._output_generate_batch_size
+        batches = {(rec.type_id, rec.id // size) for rec in exchange_records}
+        for exchange_type, bucket in sorted(batches, key=lambda x: (x[0].id, x[1])):
+            channel = exchange_type.sudo().job_channel_id.complete_name or None
+            self.with_delay(
+                channel=channel, identity_key=identity_exact
+            )._exchange_generate_batch(exchange_type.id, bucket, send=not skip_send)
+
+    def _exchange_generate_batch(self, exchange_type_id, bucket, send=False):
+        """Generate output of new records of given type and id range.
+
+        :param bucket: index of the id range, by `_output_generate_batch_size`
+        :param send: send records once their output is generated
+        """
+        size = self._output_generate_batch_size
+        domain = self._output_new_records_domain() + [
+            ("type_id", "=", exchange_type_id),
+            ("id", ">=", bucket * size),
+            ("id", "<", (bucket + 1) * size),
+        ]
+        records = self.exchange_record_model.search(domain)
+        records -= self._exchange_records_in_generate_jobs(records)
+        records.action_exchange_generate_batch(send=send)
+
+    def _exchange_records_in_generate_jobs(self, exchange_records):
+        """Return given records having their own generate job waiting or running.
+
+        Only the jobs of given records are looked up, by their identity key.
+        """
+        if not exchange_records:
+            return exchange_records
+        ids_by_identity = {
+            exchange_record_job_identity(rec, "action_exchange_generate"): rec.id
+            for rec in exchange_records
+        }
+        jobs = (
+            self.env["queue.job"]
+            .sudo()
+            .search_read(
+                [
+                    ("identity_key", "in", list(ids_by_identity)),
+                    ("state", "in", (WAIT_DEPENDENCIES, PENDING, ENQUEUED, STARTED)),
+                ],
+                ["identity_key"],
+            )
+        )
+        return exchange_records.browse(
+            [ids_by_identity[job["identity_key"]] for job in jobs]
+        )
+
+    def _exchange_record_ids_by_state(self, domain):
+        """Search exchange records and return their ids grouped by state.
+
+        Only the state is read, hence no other field is loaded in cache.
+        """
+        data = self.exchange_record_model.search_read(domain, ["edi_exchange_state"])
+        return {
+            state: [x["id"] for x in items]
+            for state, items in groupby(data, key=lambda x: x["edi_exchange_state"])
+        }
+
+    def _exchange_type_leaf(self, type_domain):
+        """Domain leaf filtering exchange records by their type.
+
+        Types are matched in a sub-query rather than w/ a join on every record.
+        """
+        exchange_types = (
+            self.env["edi.exchange.type"].sudo().with_context(active_test=False)
+        )
+        return ("type_id", "in", exchange_types._search(type_domain))
 
     def _output_new_records_domain(self, record_ids=None):
         """Domain for output records needing output content generation."""
         domain = [
             ("backend_id", "=", self.id),
-            ("type_id.exchange_file_auto_generate", "=", True),
-            ("type_id.direction", "=", "output"),
+            self._exchange_type_leaf(
+                [
+                    ("exchange_file_auto_generate", "=", True),
+                    ("direction", "=", "output"),
+                ]
+            ),
             ("edi_exchange_state", "=", "new"),
             ("exchange_file", "=", False),
         ]
@@ -446,8 +613,8 @@ class EDIBackend(models.Model):
             # you'll have to provide a `check` component.
             states += ("output_sent",)
         domain = [
-            ("type_id.direction", "=", "output"),
             ("backend_id", "=", self.id),
+            self._exchange_type_leaf([("direction", "=", "output")]),
             ("edi_exchange_state", "in", states),
         ]
         if record_ids:
@@ -466,7 +633,7 @@ class EDIBackend(models.Model):
                 _("Record ID=%d is not meant to be processed") % exchange_record.id
             )
         if (
-            not exchange_record.exchange_file
+            not exchange_record._has_file_content()
             and not exchange_record.type_id.allow_empty_files_on_receive
         ):
             raise exceptions.UserError(
@@ -593,8 +760,16 @@ class EDIBackend(models.Model):
         raise NotImplementedError()
 
     def _cron_check_input_exchange_sync(self, **kw):
+        # Run each backend in its own job: a slow backend won't hold the others
         for backend in self:
-            backend._check_input_exchange_sync(**kw)
+            backend.with_delay(
+                identity_key=identity_exact
+            )._job_check_input_exchange_sync(**kw)
+
+    def _job_check_input_exchange_sync(self, **kw):
+        """Run `_check_input_exchange_sync` in a job, one at a time per backend."""
+        self._lock_exchange_sync("input")
+        return self._check_input_exchange_sync(**kw)
 
     # TODO: add tests
     # TODO: consider splitting cron in 2 (1 for receiving, 1 for processing)
@@ -611,6 +786,7 @@ class EDIBackend(models.Model):
             "EDI Exchange input sync: found %d pending records to receive.",
             len(pending_records),
         )
+        pending_records._job_delay_params_prefetch()
         for rec in pending_records:
             rec.with_delay().action_exchange_receive()
 
@@ -621,13 +797,14 @@ class EDIBackend(models.Model):
             "EDI Exchange input sync: found %d pending records to process.",
             len(pending_process_records),
         )
+        pending_process_records._job_delay_params_prefetch()
         for rec in pending_process_records:
             rec.with_delay().action_exchange_process()
 
     def _input_pending_records_domain(self, record_ids=None):
         domain = [
             ("backend_id", "=", self.id),
-            ("type_id.direction", "=", "input"),
+            self._exchange_type_leaf([("direction", "=", "input")]),
             ("edi_exchange_state", "=", "input_pending"),
             ("exchange_file", "=", False),
         ]
@@ -639,7 +816,7 @@ class EDIBackend(models.Model):
         states = ("input_received",)
         domain = [
             ("backend_id", "=", self.id),
-            ("type_id.direction", "=", "input"),
+            self._exchange_type_leaf([("direction", "=", "input")]),
             ("edi_exchange_state", "in", states),
         ]
         if record_ids:
@@ -649,12 +826,35 @@ class EDIBackend(models.Model):
     def _find_existing_exchange_records(
         self, exchange_type, extra_domain=None, count_only=False
     ):
+        extra_domain = extra_domain or []
         domain = [
             ("backend_id", "=", self.id),
             ("type_id", "=", exchange_type.id),
-        ] + extra_domain or []
+            *extra_domain,
+        ]
         return self.env["edi.exchange.record"].search(domain, count=count_only)
 
+    def _find_existing_exchange_records_bulk(self, exchange_types, extra_domain=None):
+        """Find exchange records of current backends for given types at once.
+
+        :return: dict {(backend id, type id): edi.exchange.record recordset}
+        """
+        extra_domain = extra_domain or []
+        domain = [
+            ("backend_id", "in", self.ids),
+            ("type_id", "in", exchange_types.ids),
+            *extra_domain,
+        ]
+        # NOTE: no read_group here, it would bypass access checks done in `_search`
+        data = self.exchange_record_model.search_read(
+            domain, ["backend_id", "type_id"], load=None
+        )
+        ids_by_key = defaultdict(list)
+        for item in data:
+            ids_by_key[(item["backend_id"], item["type_id"])].append(item["id"])
+        browse = self.exchange_record_model.browse
+        return {key: browse(ids) for key, ids in ids_by_key.items()}
+
     def action_view_exchanges(self):
         xmlid = "edi_oca.act_open_edi_exchange_record_view"
         action = self.env["ir.actions.act_window"]._for_xml_id(xmlid)
@@ -676,13 +876,11 @@ class EDIBackend(models.Model):
         return action
 
     def _is_valid_edi_action(self, action, raise_if_not=False):
-        try:
-            assert action in ("generate", "send", "process", "receive", "check")
+        if action in _VALID_EDI_ACTIONS:
             return True
-        except AssertionError:
-            if raise_if_not:
-                raise
-            return False
+        if raise_if_not:
+            raise AssertionError(action)
+        return False
 
     def _failed_output_check_send_msg(self):
         return "Nothing to do. Likely already sent."
@@ -7,7 +7,9 @@ import base64
 import logging
 from collections import defaultdict
 
-from odoo import _, api, exceptions, fields, models
+from psycopg2 import OperationalError
+
+from odoo import _, api, exceptions, fields, models, tools
 
 from ..utils import exchange_record_job_identity_exact, get_checksum
 
@@ -124,6 +126,15 @@ class EDIExchangeRecord(models.Model):
         ),
     ]
 
+    def init(self):
+        # Speed up cron lookups of pending records by backend and state
+        tools.create_index(
+            self._cr,
+            "edi_exchange_record_backend_id_edi_exchange_state_index",
+            self._table,
+            ["backend_id", "edi_exchange_state"],
+        )
+
     @api.depends("model", "res_id")
     def _compute_related_name(self):
         for rec in self:
@@ -238,6 +249,11 @@ class EDIExchangeRecord(models.Model):
             )
         return self[field_name]
 
+    def _has_file_content(self, field_name="exchange_file"):
+        """Check if a file is set w/o loading its content."""
+        self.ensure_one()
+        return bool(self.with_context(bin_size=True)[field_name])
+
     def name_get(self):
         result = []
         for rec in self:
@@ -316,6 +332,36 @@ class EDIExchangeRecord(models.Model):
         self.ensure_one()
         return self.backend_id.exchange_generate(self, **kw)
 
+    def action_exchange_generate_batch(self, send=False, **kw):
+        """Generate output content for several records in one go.
+
+        Records already generated in the meantime are skipped.
+        Records failing are delegated to their own job,
+        so that errors are tracked as for a single record.
+        Concurrency errors are raised instead, to retry the whole job.
+
+        :param send: send records once their output is generated
+        """
+        todo = self.filtered(
+            lambda x: x.edi_exchange_state == "new" and not x._has_file_content()
+        )
+        for rec in todo:
+            try:
+                with self.env.cr.savepoint():
+                    rec.action_exchange_generate(**kw)
+            except OperationalError:
+                raise
+            except Exception:
+                _logger.exception(
+                    "%s: generate failed in batch, delegating to its own job",
+                    rec.identifier,
+                )
+                rec.backend_id._delay_exchange_generate(rec, skip_send=not send)
+                continue
+            if send and rec.edi_exchange_state == "output_pending":
+                # Raise prio to max to send the record out as fast as possible.
+                rec.with_delay(priority=0).action_exchange_send()
+
     def action_exchange_send(self):
         self.ensure_one()
         return self.backend_id.exchange_send(self)
@@ -598,6 +644,12 @@ class EDIExchangeRecord(models.Model):
         params["identity_key"] = exchange_record_job_identity_exact
         return params
 
+    def _job_delay_params_prefetch(self):
+        """Load in one go what `_job_delay_params` reads for each record."""
+        # Read only `type_id` on exchange records, not all their stored fields
+        records = self.sudo().with_context(prefetch_fields=False)
+        records.mapped("type_id.job_channel_id.complete_name")
+
     def with_delay(self, **kw):
         params = self._job_delay_params()
         params.update(kw)
@@ -7,7 +7,7 @@ from datetime import datetime
 
 from pytz import timezone, utc
 
-from odoo import _, api, exceptions, fields, models
+from odoo import _, api, exceptions, fields, models, tools
 from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT as DATETIME_FORMAT, groupby
 
 from odoo.addons.base_sparse_field.models.fields import Serialized
@@ -214,12 +214,27 @@ class EDIExchangeType(models.Model):
         for rec in self:
             rec.ack_for_type_ids = [x.id for x in by_type_id.get(rec.id, [])]
 
+    def write(self, vals):
+        res = super().write(vals)
+        if "advanced_settings_edit" in vals:
+            self.clear_caches()
+        return res
+
     def get_settings(self):
         return self.advanced_settings
 
     def set_settings(self, val):
         self.advanced_settings_edit = val
 
+    @tools.ormcache("self.id", "key")
+    def _get_component_conf(self, key):
+        """Return components' settings for given action key (eg: `generate`).
+
+        The value is cached: do not modify it in place.
+        """
+        self.ensure_one()
+        return self.get_settings().get("components", {}).get(key, {})
+
     @api.constrains("backend_id", "backend_type_id")
     def _check_backend(self):
         for rec in self:
@@ -35,13 +35,13 @@ class EDIBackendTestCaseBase(EDIBackendCommonTestCase):
         candidates = self.backend._get_component_usage_candidates(record, "process")
         self.assertEqual(
             candidates,
-            ["input.process"],
+            ("input.process",),
         )
         record = self.backend.create_record("test_csv_output", vals)
         candidates = self.backend._get_component_usage_candidates(record, "generate")
         self.assertEqual(
             candidates,
-            ["output.generate"],
+            ("output.generate",),
         )
         # set advanced settings on type
         settings = """
@@ -55,12 +55,12 @@ class EDIBackendTestCaseBase(EDIBackendCommonTestCase):
         candidates = self.backend._get_component_usage_candidates(record, "generate")
         self.assertEqual(
             candidates,
-            ["my.special.generate", "output.generate"],
+            ("my.special.generate", "output.generate"),
         )
         candidates = self.backend._get_component_usage_candidates(record, "send")
         self.assertEqual(
             candidates,
-            ["my.special.send", "output.send"],
+            ("my.special.send", "output.send"),
         )
 
     def test_action_view_exchanges(self):
@@ -70,3 +70,44 @@ class EDIBackendTestCaseBase(EDIBackendCommonTestCase):
     def test_action_view_exchange_types(self):
         # Just testing is not broken
         self.assertTrue(self.backend.action_view_exchange_types())
+
+    def test_find_existing_exchange_records_bulk(self):
+        vals = {
+            "model": self.partner._name,
+            "res_id": self.partner.id,
+        }
+        record_in = self.backend.create_record("test_csv_input", vals)
+        record_out1 = self.backend.create_record("test_csv_output", vals)
+        record_out2 = self.backend.create_record("test_csv_output", vals)
+        exchange_types = (
+            self.exchange_type_in + self.exchange_type_out + self.exchange_type_out_ack
+        )
+        res = self.backend._find_existing_exchange_records_bulk(exchange_types)
+        self.assertEqual(
+            res,
+            {
+                (self.backend.id, self.exchange_type_in.id): record_in,
+                (self.backend.id, self.exchange_type_out.id): record_out1 + record_out2,
+            },
+        )
+        res = self.backend._find_existing_exchange_records_bulk(
+            exchange_types, extra_domain=[("id", "=", record_out2.id)]
+        )
+        self.assertEqual(
+            res, {(self.backend.id, self.exchange_type_out.id): record_out2}
+        )
+
+    def test_find_existing_exchange_records(self):
+        vals = {
+            "model": self.partner._name,
+            "res_id": self.partner.id,
+        }
+        record1 = self.backend.create_record("test_csv_output", vals)
+        record2 = self.backend.create_record("test_csv_output", vals)
+        find = self.backend._find_existing_exchange_records
+        self.assertEqual(find(self.exchange_type_out), record1 + record2)
+        self.assertEqual(find(self.exchange_type_out, count_only=True), 2)
+        self.assertEqual(
+            find(self.exchange_type_out, extra_domain=[("id", "=", record1.id)]),
+            record1,
+        )
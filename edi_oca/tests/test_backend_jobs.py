@@ -2,11 +2,15 @@
 # @author: Simone Orsi <simahawk@gmail.com>
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+from contextlib import closing
 from unittest import mock
 
 from requests.exceptions import ConnectionError as ReqConnectionError
 
+from odoo import sql_db
+
 from odoo.addons.queue_job.exception import RetryableJobError
+from odoo.addons.queue_job.job import Job
 from odoo.addons.queue_job.tests.common import JobMixin
 
 from .common import EDIBackendCommonTestCase
@@ -116,3 +120,85 @@ class EDIBackendTestJobsCase(EDIBackendCommonTestCase, JobMixin):
         new_created = job_counter.search_created() - created
         # Should not create new job
         self.assertEqual(len(new_created), 0)
+
+    def test_cron_sync_job_per_backend(self):
+        job_counter = self.job_counter()
+        self.backend._cron_check_output_exchange_sync()
+        self.backend._cron_check_input_exchange_sync()
+        created = job_counter.search_created()
+        self.assertEqual(
+            sorted(created.mapped("method_name")),
+            ["_job_check_input_exchange_sync", "_job_check_output_exchange_sync"],
+        )
+        self.assertEqual(set(created.mapped("channel")), {"root.edi.edi_sync"})
+        # Same jobs are not enqueued twice
+        self.backend._cron_check_output_exchange_sync()
+        self.assertFalse(job_counter.search_created() - created)
+
+    def test_cron_sync_job_no_overlap(self):
+        # Another transaction is running the output sync of the backend
+        with closing(sql_db.db_connect(self.env.cr.dbname).cursor()) as cr:
+            cr.execute(
+                "SELECT pg_try_advisory_xact_lock(hashtext(%s), %s)",
+                ("edi_backend_output_sync", self.backend.id),
+            )
+            self.assertTrue(cr.fetchone()[0])
+            with mock.patch.object(
+                type(self.backend), "_check_output_exchange_sync"
+            ) as mocked:
+                with self.assertRaises(RetryableJobError):
+                    self.backend._job_check_output_exchange_sync()
+                mocked.assert_not_called()
+                # Input sync is not locked
+                with mock.patch.object(
+                    type(self.backend), "_check_input_exchange_sync"
+                ) as mocked_input:
+                    self.backend._job_check_input_exchange_sync()
+                    mocked_input.assert_called_once()
+            cr.rollback()
+        # Lock released
+        with mock.patch.object(
+            type(self.backend), "_check_output_exchange_sync"
+        ) as mocked:
+            self.backend._job_check_output_exchange_sync(skip_send=True)
+            mocked.assert_called_once_with(skip_send=True)
+
+    def test_output_sync_skip_records_in_jobs(self):
+        vals = {
+            "model": self.partner._name,
+            "res_id": self.partner.id,
+        }
+        record1 = self.backend.create_record("test_csv_output", vals)
+        record1.type_id.exchange_file_auto_generate = True
+        job_counter = self.job_counter()
+        record1.with_delay().action_exchange_generate()
+        created = job_counter.search_created()
+        self.assertEqual(len(created), 1)
+        record2 = self.backend.create_record("test_csv_output", vals)
+        records = record1 + record2
+        backend_cls = type(self.backend)
+        with mock.patch.object(backend_cls, "_output_generate_batch_size", 10**6):
+            self.backend._check_output_exchange_sync(
+                skip_send=True, record_ids=records.ids
+            )
+            new_created = job_counter.search_created() - created
+            self.assertEqual(len(new_created), 1)
+            self.assertEqual(new_created.method_name, "_exchange_generate_batch")
+            self.assertEqual(new_created.record_ids, self.backend.ids)
+            created |= new_created
+            # Same records are not enqueued twice
+            self.backend._check_output_exchange_sync(
+                skip_send=True, record_ids=records.ids
+            )
+            self.assertFalse(job_counter.search_created() - created)
+            # Only records w/o their own generate job are generated in batch
+            with mock.patch.object(
+                backend_cls, "_exchange_generate"
+            ) as mocked_generate, mock.patch.object(
+                backend_cls, "_validate_data"
+            ) as mocked_validate:
+                mocked_generate.return_value = "filecontent"
+                mocked_validate.return_value = None
+                Job.load(self.env, new_created.uuid).perform()
+        self.assertEqual(record1.edi_exchange_state, "new")
+        self.assertEqual(record2.edi_exchange_state, "output_pending")
@@ -135,15 +135,18 @@ class EDIBackendTestOutputJobsCase(EDIBackendCommonComponentRegistryTestCase):
     def test_job(self):
         with trap_jobs() as trap:
             self.backend._check_output_exchange_sync(record_ids=self.record.ids)
-            trap.assert_jobs_count(2)
-            trap.assert_enqueued_job(
-                self.record.action_exchange_generate,
-            )
+            trap.assert_jobs_count(1)
             trap.assert_enqueued_job(
-                self.record.action_exchange_send, properties=dict(priority=0)
+                self.backend._exchange_generate_batch,
+                args=(self.record.type_id.id, self.record.id // 100),
+                kwargs={"send": True},
             )
-            # No matter how many times we schedule jobs
+            # A per-record generate job is not deduplicated against a batch job:
+            # the batch job identity covers an id range, not a single record
             self.record.with_delay().action_exchange_generate()
+            trap.assert_jobs_count(2)
+            trap.assert_enqueued_job(self.record.action_exchange_generate)
+            # No matter how many times we schedule it again
             self.record.with_delay().action_exchange_generate()
             self.record.with_delay().action_exchange_generate()
             # identity key should prevent having new jobs for same record same file
@@ -158,3 +161,48 @@ class EDIBackendTestOutputJobsCase(EDIBackendCommonComponentRegistryTestCase):
             self.record.with_delay().action_exchange_send()
             trap.assert_jobs_count(4)
         # TODO: test input in the same way
+
+    def test_job_batch(self):
+        vals = {
+            "model": self.partner._name,
+            "res_id": self.partner.id,
+        }
+        records = self.record + self.backend.create_record("test_csv_output", vals)
+        backend_cls = type(self.backend)
+        exchange_type_id = self.record.type_id.id
+        with trap_jobs() as trap:
+            with mock.patch.object(backend_cls, "_output_generate_batch_size", 10**6):
+                self.backend._check_output_exchange_sync(record_ids=records.ids)
+            # Records of the same type and id range are generated in one job
+            trap.assert_jobs_count(1)
+            trap.assert_enqueued_job(
+                self.backend._exchange_generate_batch,
+                args=(exchange_type_id, 0),
+                kwargs={"send": True},
+            )
+        with trap_jobs() as trap:
+            with mock.patch.object(backend_cls, "_output_generate_batch_size", 1):
+                self.backend._check_output_exchange_sync(record_ids=records.ids)
+            # Each id range gets its own job
+            trap.assert_jobs_count(2)
+            for rec in records:
+                trap.assert_enqueued_job(
+                    self.backend._exchange_generate_batch,
+                    args=(exchange_type_id, rec.id),
+                    kwargs={"send": True},
+                )
+        with trap_jobs() as trap, mock.patch.object(
+            backend_cls, "_output_generate_batch_size", 10**6
+        ):
+            self.backend._exchange_generate_batch(exchange_type_id, 0, send=True)
+            for rec in records:
+                self.assertEqual(rec.edi_exchange_state, "output_pending")
+                self.assertTrue(FakeOutputGenerator.check_called_for(rec))
+                trap.assert_enqueued_job(
+                    rec.action_exchange_send, properties=dict(priority=0)
+                )
+            trap.assert_jobs_count(2)
+            # Records already generated are skipped
+            self.backend._exchange_generate_batch(exchange_type_id, 0, send=True)
+            records.action_exchange_generate_batch(send=True)
+            trap.assert_jobs_count(2)
@@ -2,7 +2,9 @@
 # @author: Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
-from odoo.addons.component.core import Component
+from unittest import mock
+
+from odoo.addons.component.core import Component, WorkContext
 
 from .common import EDIBackendCommonComponentRegistryTestCase
 
@@ -69,3 +71,49 @@ class EDIBackendTestMatchCase(EDIBackendCommonComponentRegistryTestCase):
             exchange_type="test_csv_output",
         )
         self.assertEqual(component._name, MatchByExchangeTypeOnly._name)
+
+    def test_component_match_cached(self):
+        """Matching components are looked up once per registry and args."""
+
+        class MatchCached(Component):
+            _name = "match.cached"
+            _inherit = "edi.component.mixin"
+            _usage = "generate.cached"
+            _backend_type = "demo_backend"
+            _apply_on = ["res.partner"]
+
+        self._build_components(MatchCached)
+
+        work_ctx = {"exchange_record": self.env["edi.exchange.record"].browse()}
+        with mock.patch.object(
+            WorkContext,
+            "_matching_components",
+            autospec=True,
+            side_effect=WorkContext._matching_components,
+        ) as mocked:
+            for __ in range(2):
+                component = self.backend._find_component(
+                    "res.partner",
+                    ["generate.cached"],
+                    work_ctx=dict(work_ctx),
+                    backend_type="demo_backend",
+                )
+                self.assertEqual(component._name, MatchCached._name)
+        self.assertEqual(mocked.call_count, 1)
+        # Lookup args that cannot be hashed are not cached
+        with mock.patch.object(
+            WorkContext,
+            "_matching_components",
+            autospec=True,
+            side_effect=WorkContext._matching_components,
+        ) as mocked:
+            for __ in range(2):
+                component = self.backend._find_component(
+                    "res.partner",
+                    ["generate.cached"],
+                    work_ctx=dict(work_ctx),
+                    backend_type="demo_backend",
+                    extra_attrs=["unhashable"],
+                )
+                self.assertEqual(component._name, MatchCached._name)
+        self.assertEqual(mocked.call_count, 2)
@@ -235,3 +235,15 @@ class EDIRecordTestCase(EDIBackendCommonTestCase):
         record0.exchange_file = filecontent
         self.assertEqual(record0.exchange_filechecksum, checksum2)
         self.assertNotEqual(record0.exchange_filechecksum, checksum1)
+
+    def test_has_file_content(self):
+        vals = {
+            "model": self.partner._name,
+            "res_id": self.partner.id,
+        }
+        record0 = self.backend.create_record("test_csv_output", vals)
+        self.assertFalse(record0._has_file_content())
+        record0._set_file_content("ABC")
+        self.assertTrue(record0._has_file_content())
+        record0.exchange_file = False
+        self.assertFalse(record0._has_file_content())
@@ -3,6 +3,7 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
 import hashlib
+from types import SimpleNamespace
 
 from odoo.addons.http_routing.models.ir_http import slugify
 from odoo.addons.queue_job.job import identity_exact_hasher
@@ -24,3 +25,15 @@ def exchange_record_job_identity_exact(job_):
         str(sorted(job_.recordset.mapped("exchange_filechecksum"))).encode("utf-8")
     )
     return hasher.hexdigest()
+
+
+def exchange_record_job_identity(exchange_record, method_name, args=(), kwargs=None):
+    """Compute `exchange_record_job_identity_exact` w/o building the job."""
+    job_ = SimpleNamespace(
+        model_name=exchange_record._name,
+        method_name=method_name,
+        recordset=exchange_record,
+        args=tuple(args),
+        kwargs=kwargs or {},
+    )
+    return exchange_record_job_identity_exact(job_)
@@ -62,11 +62,13 @@ class EDIBackend(models.Model):
 
     _storage_actions = ("check", "send", "receive")
 
-    def _get_component_usage_candidates(self, exchange_record, key):
-        candidates = super()._get_component_usage_candidates(exchange_record, key)
+    def _get_component_usage_candidates(self, exchange_record, key, record_conf=None):
+        candidates = super()._get_component_usage_candidates(
+            exchange_record, key, record_conf=record_conf
+        )
         if not self.storage_id or key not in self._storage_actions:
             return candidates
-        return ["storage.{}".format(key)] + candidates
+        return ("storage.{}".format(key),) + candidates
 
     def _component_match_attrs(self, exchange_record, key):
         # Override to inject storage_type
@@ -11,11 +11,13 @@ class EdiBackend(models.Model):
     webservice_backend_id = fields.Many2one("webservice.backend")
     _webservice_actions = ("send", "receive")
 
-    def _get_component_usage_candidates(self, exchange_record, key):
-        candidates = super()._get_component_usage_candidates(exchange_record, key)
+    def _get_component_usage_candidates(self, exchange_record, key, record_conf=None):
+        candidates = super()._get_component_usage_candidates(
+            exchange_record, key, record_conf=record_conf
+        )
         if not self.webservice_backend_id or key not in self._webservice_actions:
             return candidates
-        return ["webservice.{}".format(key)] + candidates
+        return ("webservice.{}".format(key),) + candidates
 
     def _component_match_attrs(self, exchange_record, key):
         # Override to inject `webservice_protocol` as match attribute